@@ -1,68 +1,39 @@
 import os
-import uuid
 
 import numpy as np
-import pandas as pd
 import streamlit as st
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
-from sentence_transformers import CrossEncoder, SentenceTransformer
+from scipy.special import expit
+
+from pipeline.models import embed_query, load_encoder, load_reranker
+from pipeline.qdrant_bootstrap import COLLECTION_NAME, PARQUET_PATH, open_vector_db
+from pipeline.rerank import bucketize, rerank
 
 # Page Config
 st.set_page_config(page_title="3-2-1 Newsletter Search", page_icon="📚", layout="wide")
 
-# Constants
-COLLECTION_NAME = "3-2-1-newsletter"
-PARQUET_PATH = "data/parquet/newsletter_embeddings.parquet"
-
 
 @st.cache_resource
 def load_models():
     """Load models once and cache them to avoid reloading on every interaction."""
-    encoder = SentenceTransformer("all-MiniLM-L6-v2")
-    reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+    encoder = load_encoder()
+    reranker = load_reranker()
     return encoder, reranker
 
 
 @st.cache_resource
 def init_vector_db():
     """
-    Initialize an in-memory Qdrant instance and load data from Parquet.
-    This runs only once when the app starts.
+    Open the on-disk Qdrant store, seeding it from Parquet on first boot only.
+    This runs only once per process and the store survives restarts.
     """
-    # 1. Initialize In-Memory Qdrant
-    qdrant = QdrantClient(":memory:")
-
-    # 2. Load Data
     if not os.path.exists(PARQUET_PATH):
         return None
 
-    df = pd.read_parquet(PARQUET_PATH)
-
-    # 3. Create Collection
-    qdrant.recreate_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=VectorParams(size=384, distance=Distance.DOT),
-    )
-
-    # 4. Upload Points
-    points = []
-    for _, row in df.iterrows():
-        vector = row["vector"].tolist()
-        payload = row.to_dict()
-        payload.pop("vector", None)
-
-        points.append(
-            PointStruct(
-                id=uuid.uuid4().hex,
-                vector=vector,
-                payload=payload,
-            )
-        )
+    return open_vector_db()
 
-    qdrant.upload_points(collection_name=COLLECTION_NAME, points=points, batch_size=64)
 
-    return qdrant
+# Display labels indexed by relevance bucket
+RELEVANCE_LABELS = ("🟢 High", "🟡 Medium", "🔴 Low")
 
 
 @st.cache_data
@@ -79,36 +50,40 @@ def perform_search(query_text):
         return None
 
     # 1. Vector Search (Retrieval)
-    query_vector = encoder.encode(query_text, normalize_embeddings=True).tolist()
+    query_vector = list(embed_query(encoder, query_text))
 
     hits = qdrant.query_points(
-        collection_name=COLLECTION_NAME, query=query_vector, limit=20
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        limit=20,
     ).points
 
     if not hits:
         return []
 
     # 2. Reranking
-    pairs = [[query_text, hit.payload.get("text", "")] for hit in hits]
-    cross_scores = reranker.predict(pairs)
-
-    reranked_results = list(zip(hits, cross_scores))
-    # Sort by new score
-    reranked_results = sorted(reranked_results, key=lambda x: x[1], reverse=True)
-
-    return reranked_results
-
+    cross_scores = rerank(
+        reranker, query_text, [hit.payload.get("text", "") for hit in hits]
+    )
 
-def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
+    # Relevance probabilities and buckets for all hits at once
+    scores = np.asarray(cross_scores)
+    probs = expit(scores) * 100
+    buckets = bucketize(scores)
 
+    # Sort by new score
+    order = np.argsort(-scores, kind="stable")
 
-def get_relevance_label(logit):
-    if logit >= 3:
-        return "🟢 High"
-    elif logit >= 0:
-        return "🟡 Medium"
-    return "🔴 Low"
+    # Plain rows so the cached value holds primitives only, not hit objects
+    return [
+        {
+            **hits[i].payload,
+            "score": float(scores[i]),
+            "prob": float(probs[i]),
+            "label": RELEVANCE_LABELS[buckets[i]],
+        }
+        for i in order
+    ]
 
 
 # --- UI Structure ---
@@ -126,10 +101,9 @@ if not os.path.exists(PARQUET_PATH):
     )
     st.stop()
 
-# Load Resources (Trigger cache)
+# Load Resources (Trigger cache), the vector store opens on first search
 with st.spinner("Booting up knowledge base..."):
     load_models()
-    init_vector_db()
 
 # Search UI
 with st.form("search_form"):
@@ -153,18 +127,16 @@ if submitted and query:
         st.write(f"Found **{len(results)}** results.")
         st.divider()
 
-        for hit, new_score in results:
+        for row in results:
             # Threshold for display
-            if new_score > -2:
-                payload = hit.payload
-                date = payload.get("date", "Unknown Date")
-                category = payload.get("category", "General")
-                text = payload.get("text", "")
-                url = payload.get("url", "#")
-                title = payload.get("title", "Newsletter Issue")
-
-                score_label = get_relevance_label(new_score)
-                prob = sigmoid(new_score) * 100
+            if row["score"] > -2:
+                date = row.get("date", "Unknown Date")
+                category = row.get("category", "General")
+                text = row.get("text", "")
+                url = row.get("url", "#")
+                title = row.get("title", "Newsletter Issue")
+                prob = row["prob"]
+                score_label = row["label"]
 
                 with st.container():
                     c1, c2 = st.columns([0.85, 0.15])
@@ -1,16 +1,14 @@
 import asyncio
 import json
 import os
-from collections.abc import Iterable
 from contextlib import AsyncExitStack
 from typing import Optional
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from openai import OpenAI
+from openai import AsyncOpenAI
 from openai.types.chat import (
     ChatCompletionMessageFunctionToolCall,
-    ChatCompletionMessageToolCallUnion,
     ChatCompletionToolUnionParam,
 )
 from rich.console import Console
@@ -29,6 +27,15 @@ MCP_SERVER_CONFIG = {
     "env": None,
 }
 
+# Messages kept in the conversation sent to the LLM
+MAX_HISTORY = 20
+
+# Tool calls from a single model turn executed at once
+MAX_CONCURRENT_TOOL_CALLS = 4
+
+# Converted tool schemas per server command, shared by every agent in the process
+TOOLS_CACHE: dict[tuple[str, ...], tuple[ChatCompletionToolUnionParam, ...]] = {}
+
 
 def convert_mcp_tool_to_function(tool) -> ChatCompletionToolUnionParam:
     """Convert MCP tool schema to OpenAI function format."""
@@ -68,12 +75,14 @@ class MCPAgent:
         """
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
-        self.openai = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=api_key)
+        self.openai = AsyncOpenAI(
+            base_url="https://openrouter.ai/api/v1", api_key=api_key
+        )
         self.model = model
         self.debug = debug
         self.console = Console()
         self.messages = []
-        self.available_tools: Iterable[ChatCompletionToolUnionParam] = []
+        self.available_tools: tuple[ChatCompletionToolUnionParam, ...] = ()
 
     async def connect_to_mcp_server(self, mcp_server_config: dict):
         """
@@ -93,14 +102,19 @@ class MCPAgent:
 
         await self.session.initialize()
 
-        # Cache available tools
-        response = await self.session.list_tools()
-        self.available_tools = [
-            convert_mcp_tool_to_function(tool) for tool in response.tools
-        ]
+        # Convert available tools once per server command
+        cache_key = (mcp_server_config["command"], *mcp_server_config["args"])
+
+        if cache_key not in TOOLS_CACHE:
+            response = await self.session.list_tools()
+            TOOLS_CACHE[cache_key] = tuple(
+                convert_mcp_tool_to_function(tool) for tool in response.tools
+            )
+
+        self.available_tools = TOOLS_CACHE[cache_key]
 
         # Display connection success
-        tool_names = [tool.name for tool in response.tools]
+        tool_names = [tool["function"]["name"] for tool in self.available_tools]
         self.console.print(
             Panel(
                 f"[green]Connected successfully![/green]\n\n"
@@ -121,21 +135,32 @@ class MCPAgent:
             The assistant's response as a string
         """
         self.messages.append({"role": "user", "content": query})
+        self._trim_history()
 
         if self.debug:
             self._debug_log("Request", self.messages)
 
         # First API call
         response = await self._call_llm()
-        self.messages.append(response.choices[0].message.model_dump())
+        self.messages.append(
+            response.choices[0].message.model_dump(mode="json", exclude_none=True)
+        )
 
         content = response.choices[0].message
 
-        # Check if the model wants to call a tool
-        if content.tool_calls and len(content.tool_calls) > 0:
-            tool_call: ChatCompletionMessageToolCallUnion = content.tool_calls[0]
+        # Check if the model wants to call tools
+        function_calls = [
+            tool_call
+            for tool_call in content.tool_calls or []
+            if type(tool_call) is ChatCompletionMessageFunctionToolCall
+        ]
+
+        if function_calls:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOOL_CALLS)
 
-            if type(tool_call) is ChatCompletionMessageFunctionToolCall:
+            async def run_tool_call(
+                tool_call: ChatCompletionMessageFunctionToolCall,
+            ) -> tuple[str, str]:
                 tool_name = tool_call.function.name
                 tool_args = json.loads(tool_call.function.arguments or "{}")
 
@@ -143,18 +168,29 @@ class MCPAgent:
                 self._display_tool_call(tool_name, tool_args)
 
                 # Execute tool
-                tool_result = await self._execute_tool(
-                    tool_name, tool_args, tool_call.id
-                )
+                async with semaphore:
+                    tool_result = await self._execute_tool(
+                        tool_name, tool_args, tool_call.id
+                    )
+
+                return tool_name, tool_result
+
+            # Execute every tool call of this turn concurrently
+            results = await asyncio.gather(
+                *(run_tool_call(tool_call) for tool_call in function_calls)
+            )
 
-                # Display tool result
+            # Display tool results
+            for tool_name, tool_result in results:
                 self._display_tool_result(tool_name, tool_result)
 
-                # Get final response from LLM after tool execution
-                response = await self._call_llm()
-                self.messages.append(response.choices[0].message.model_dump())
+            # Get final response from LLM after tool execution
+            response = await self._call_llm()
+            self.messages.append(
+                response.choices[0].message.model_dump(mode="json", exclude_none=True)
+            )
 
-                return response.choices[0].message.content or ""
+            return response.choices[0].message.content or ""
 
         return content.content or ""
 
@@ -162,13 +198,13 @@ class MCPAgent:
         """Make an API call to the LLM."""
         try:
             if self.available_tools:
-                return self.openai.chat.completions.create(
+                return await self.openai.chat.completions.create(
                     model=self.model,
                     tools=self.available_tools,
                     messages=self.messages,
                 )
             else:
-                return self.openai.chat.completions.create(
+                return await self.openai.chat.completions.create(
                     model=self.model,
                     messages=self.messages,
                 )
@@ -253,6 +289,23 @@ class MCPAgent:
             )
         )
 
+    def _trim_history(self):
+        """Keep a sliding window of recent messages, starting on a user turn."""
+        if len(self.messages) <= MAX_HISTORY:
+            return
+
+        system = [m for m in self.messages[:1] if m["role"] == "system"]
+        window_start = len(self.messages) - MAX_HISTORY
+
+        # Never start on an assistant or tool message cut off from its request
+        start = next(
+            i
+            for i, m in enumerate(self.messages)
+            if i >= window_start and m["role"] == "user"
+        )
+
+        self.messages = system + self.messages[start:]
+
     def _debug_log(self, title: str, data):
         """Display debug information."""
         json_str = json.dumps(data, indent=2)
@@ -313,6 +366,7 @@ class MCPAgent:
     async def cleanup(self):
         """Clean up resources."""
         await self.exit_stack.aclose()
+        await self.openai.close()
 
 
 async def main():
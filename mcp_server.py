@@ -5,22 +5,21 @@ This server provides a tool to search through James Clear's newsletter archive
 using semantic search with reranking.
 """
 
-import os
-import uuid
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-import pandas as pd
 from fastmcp import FastMCP
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from qdrant_client.models import FieldCondition, Filter, Range
 from sentence_transformers import CrossEncoder, SentenceTransformer
 
-# Constants
-COLLECTION_NAME = "3-2-1-newsletter"
-PARQUET_PATH = "data/parquet/newsletter_embeddings.parquet"
+from pipeline.models import embed_query, load_encoder, load_reranker
+from pipeline.qdrant_bootstrap import COLLECTION_NAME, open_vector_db
+from pipeline.rerank import rerank_until
 
+# Payload fields returned for each result
+RESULT_FIELDS = ("title", "date", "category", "url", "text")
 
 # Global variables for models and database
 encoder: SentenceTransformer
@@ -34,42 +33,21 @@ async def server_lifespan(server: FastMCP):
     global encoder, reranker, qdrant
 
     # Load models
-    encoder = SentenceTransformer("all-MiniLM-L6-v2")
-    reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
+    encoder = load_encoder()
+    reranker = load_reranker()
 
-    # Initialize In-Memory Qdrant
-    qdrant = QdrantClient(":memory:")
+    # Open persistent Qdrant, seeding it from Parquet on first boot only
+    qdrant = open_vector_db()
 
-    # Load Data
-    if not os.path.exists(PARQUET_PATH):
-        raise FileNotFoundError(f"Parquet file not found at {PARQUET_PATH}")
-
-    df = pd.read_parquet(PARQUET_PATH)
+    yield  # Server runs here
 
-    # Create Collection
-    qdrant.recreate_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=VectorParams(size=384, distance=Distance.DOT),
-    )
+    qdrant.close()
 
-    # Upload Points
-    points = []
-    for _, row in df.iterrows():
-        vector = row["vector"].tolist()
-        payload = row.to_dict()
-        payload.pop("vector", None)
-
-        points.append(
-            PointStruct(
-                id=uuid.uuid4().hex,
-                vector=vector,
-                payload=payload,
-            )
-        )
 
-    qdrant.upload_points(collection_name=COLLECTION_NAME, points=points, batch_size=64)
-
-    yield  # Server runs here
+def to_unix_seconds(date_str: str) -> int:
+    """Convert a YYYY-MM-DD date to UTC unix seconds"""
+    date = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(date.timestamp())
 
 
 # Initialize FastMCP server
@@ -97,12 +75,12 @@ def search_newsletter(
     Returns:
         A dictionary with query info and results list containing title, date, category, URL, text, and relevance score
     """
-    # Parse dates if provided
-    from_datetime = None
-    to_datetime = None
+    # Parse dates if provided, as UTC unix seconds to match the date_ts payload
+    from_ts = None
+    to_ts = None
     if from_date:
         try:
-            from_datetime = datetime.strptime(from_date, "%Y-%m-%d")
+            from_ts = to_unix_seconds(from_date)
         except ValueError:
             return {
                 "error": "Invalid from_date format. Use YYYY-MM-DD (e.g., '2019-10-10')"
@@ -110,18 +88,28 @@ def search_newsletter(
 
     if to_date:
         try:
-            to_datetime = datetime.strptime(to_date, "%Y-%m-%d")
+            to_ts = to_unix_seconds(to_date)
         except ValueError:
             return {
                 "error": "Invalid to_date format. Use YYYY-MM-DD (e.g., '2023-12-31')"
             }
 
     # Encode query
-    query_vector = encoder.encode(query, normalize_embeddings=True).tolist()
+    query_vector = list(embed_query(encoder, query))
+
+    # Let Qdrant apply the date range during retrieval
+    query_filter = None
+    if from_ts is not None or to_ts is not None:
+        query_filter = Filter(
+            must=[FieldCondition(key="date_ts", range=Range(gte=from_ts, lte=to_ts))]
+        )
 
-    # Initial retrieval (get more to account for filtering)
+    # Initial retrieval (get more to account for score filtering)
     hits = qdrant.query_points(
-        collection_name=COLLECTION_NAME, query=query_vector, limit=50
+        collection_name=COLLECTION_NAME,
+        query=query_vector,
+        query_filter=query_filter,
+        limit=50,
     ).points
 
     if not hits:
@@ -136,45 +124,15 @@ def search_newsletter(
             "results": [],
         }
 
-    # Prepare pairs for reranking
-    pairs = [[query, hit.payload.get("text", "")] for hit in hits]
-
-    # Rerank
-    cross_scores = reranker.predict(pairs)
-
-    # Combine hits with scores
-    reranked_results = list(zip(hits, cross_scores))
-
-    # Sort by new score (descending)
-    reranked_results = sorted(reranked_results, key=lambda x: x[1], reverse=True)
-
-    # Filter by date and score
-    filtered_results = []
-    for hit, score in reranked_results:
-        # Filter by minimum score
-        if score < min_score:
-            continue
-
-        # Filter by date
-        date_str = hit.payload.get("date")
-        if date_str:
-            try:
-                # Parse date (handle different formats if needed)
-                result_date = datetime.strptime(date_str, "%Y-%m-%d")
-
-                if from_datetime and result_date < from_datetime:
-                    continue
-                if to_datetime and result_date > to_datetime:
-                    continue
-            except ValueError:
-                # If date parsing fails, skip date filtering for this item
-                pass
-
-        filtered_results.append((hit, score))
-
-        # Stop if we've collected enough results
-        if len(filtered_results) >= limit:
-            break
+    # Rerank in retrieval order, stopping once enough hits pass min_score
+    indices, scores = rerank_until(
+        reranker,
+        query,
+        [hit.payload.get("text", "") for hit in hits],
+        min_score=min_score,
+        limit=limit,
+    )
+    filtered_results = [(hits[i], score) for i, score in zip(indices, scores)]
 
     if not filtered_results:
         return {
@@ -188,20 +146,14 @@ def search_newsletter(
             "results": [],
         }
 
-    # Build structured results
-    results = []
-    for hit, score in filtered_results:
-        payload = hit.payload
-        results.append(
-            {
-                "title": str(payload.get("title", "")),
-                "date": str(payload.get("date", "")),
-                "category": str(payload.get("category", "")),
-                "url": str(payload.get("url", "")),
-                "text": str(payload.get("text", "")),
-                "score": round(float(score), 4),
-            }
-        )
+    # Build structured results, payload values are already JSON types
+    results = [
+        {
+            **{field: hit.payload.get(field, "") for field in RESULT_FIELDS},
+            "score": round(float(score), 4),
+        }
+        for hit, score in filtered_results
+    ]
 
     return {
         "query": query,
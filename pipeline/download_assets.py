@@ -1,12 +1,13 @@
+import asyncio
 import os
 import random
 import re
-import time
 from datetime import datetime
 
 import dagster as dg
+import httpx
 
-from pipeline.utils import download_and_save, get_sitemap_urls
+from pipeline.utils import download_and_save_async, get_safe_filename, get_sitemap_urls
 
 # Data directories
 DATA_DIR = "data"
@@ -15,6 +16,14 @@ RAW_HTML_DIR = f"{DATA_DIR}/raw/html"
 # Sitemap URL
 SITEMAP_URL = "https://jamesclear.com/3-2-1-sitemap.xml"
 
+# Newsletter issue URLs, e.g. https://jamesclear.com/3-2-1/april-10-2025
+ISSUE_URL_PATTERN = re.compile(
+    r"https?://jamesclear\.com/3-2-1/(?P<month>[a-zA-Z]+)-(?P<day>\d{1,2})-(?P<year>\d{4})"
+)
+
+# Requests in flight at once against the host
+MAX_CONCURRENT_DOWNLOADS = 4
+
 
 @dg.asset(group_name="download_pipeline")
 def sitemap_urls() -> list[str]:
@@ -29,12 +38,8 @@ def newsletter_issue_urls(
     """Parse sitemap URLs and extract newsletter issue dates"""
     issues: dict[datetime, str] = {}
 
-    pattern = re.compile(
-        r"https?://jamesclear\.com/3-2-1/(?P<month>[a-zA-Z]+)-(?P<day>\d{1,2})-(?P<year>\d{4})"
-    )
-
     for url in sitemap_urls:
-        match = pattern.search(url)
+        match = ISSUE_URL_PATTERN.search(url)
 
         if match:
             month_str = match.group("month")
@@ -72,6 +77,32 @@ def new_newsletter_urls(
     return all_urls
 
 
+async def download_all(context: dg.AssetExecutionContext, urls: list[str]) -> list[str]:
+    """Download URLs concurrently, capped and with a polite delay per request"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+
+    # One pooled connection per download slot, retries happen per download
+    limits = httpx.Limits(max_connections=MAX_CONCURRENT_DOWNLOADS)
+
+    async with httpx.AsyncClient(limits=limits) as client:
+
+        async def download(url: str) -> str:
+            async with semaphore:
+                await download_and_save_async(client, url, RAW_HTML_DIR)
+                context.log.info(f"✓ Downloaded: {url}")
+
+                # Hold the slot while sleeping so the cap also limits request rate
+                sleep_time = random.uniform(1, 3)
+                context.log.info(
+                    f"[SLEEP] Sleeping {sleep_time:.1f}s to be respectful..."
+                )
+                await asyncio.sleep(sleep_time)
+
+            return url
+
+        return await asyncio.gather(*(download(url) for url in urls))
+
+
 @dg.asset(group_name="download_pipeline")
 def downloaded_html_files(
     context: dg.AssetExecutionContext, new_newsletter_urls: list[str]
@@ -79,24 +110,19 @@ def downloaded_html_files(
     """Download newsletter HTML files to disk (skips existing files)"""
     os.makedirs(RAW_HTML_DIR, exist_ok=True)
 
-    downloaded_count = 0
+    to_download: list[str] = []
     skipped_count = 0
 
+    # Skip existing files before queueing so cached runs stay instant
     for url in new_newsletter_urls:
-        _, was_downloaded = download_and_save(url, RAW_HTML_DIR)
-
-        if was_downloaded:
-            downloaded_count += 1
-            context.log.info(f"✓ Downloaded: {url}")
-
-            # Only sleep after actual network requests
-            sleep_time = random.uniform(1, 3)
-            context.log.info(f"[SLEEP] Sleeping {sleep_time:.1f}s to be respectful...")
-            time.sleep(sleep_time)
-        else:
+        if os.path.exists(os.path.join(RAW_HTML_DIR, get_safe_filename(url))):
             skipped_count += 1
             context.log.info(f"⊘ Skipped (exists): {url}")
+        else:
+            to_download.append(url)
+
+    downloaded = asyncio.run(download_all(context, to_download))
 
-    context.log.info(f"Summary: {downloaded_count} downloaded, {skipped_count} skipped")
+    context.log.info(f"Summary: {len(downloaded)} downloaded, {skipped_count} skipped")
 
     return None
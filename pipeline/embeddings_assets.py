@@ -6,7 +6,7 @@ from typing import Any
 import dagster as dg
 import pandas as pd
 
-from pipeline.utils import parse_newsletter
+from pipeline.utils import parse_newsletter, write_parquet
 
 # Data directories
 DATA_DIR = "data"
@@ -78,13 +78,6 @@ def text_chunks_for_embedding(
 
     df = pd.json_normalize(all_issues)
     df.columns = [c.replace("metadata.", "") for c in df.columns]
-    df.to_parquet(
-        os.path.join(
-            PARQUET_DIR,
-            "newsletter_embeddings.parquet",
-        ),
-        engine="pyarrow",
-        index=False,
-    )
+    write_parquet(df, os.path.join(PARQUET_DIR, "newsletter_embeddings.parquet"))
 
     return None
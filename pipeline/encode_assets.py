@@ -1,14 +1,74 @@
 import os
+import zipfile
 
 import dagster as dg
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from sentence_transformers import SentenceTransformer
 
+from pipeline.models import load_torch_model
+from pipeline.utils import text_key, write_parquet
+
 # Data directories
 DATA_DIR = "data"
 RAW_MARKDOWN_DIR = f"{DATA_DIR}/raw/md"
 PARQUET_DIR = f"{DATA_DIR}/parquet"
 
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+ENCODE_BATCH_SIZE = 256
+
+# Vectors from previous runs, keyed by a hash of the chunk text
+EMBEDDING_CACHE_FILE = "embedding_cache.npz"
+
+
+def stack_vectors(vectors: list[np.ndarray]) -> np.ndarray:
+    """Stack vectors into a float16 matrix, (0, EMBEDDING_DIM) when there are none"""
+    if not vectors:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float16)
+
+    return np.stack(vectors).astype(np.float16)
+
+
+def load_embedding_cache(path: str) -> dict[str, np.ndarray]:
+    """Load cached vectors by text key, empty if missing, unreadable or stale"""
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with np.load(path) as cache:
+            if str(cache["model"]) != EMBEDDING_MODEL:
+                return {}
+
+            return dict(zip(cache["keys"].tolist(), cache["vectors"]))
+
+    except (EOFError, KeyError, OSError, ValueError, zipfile.BadZipFile):
+        # A cache truncated by an older run only costs a full re-encode
+        return {}
+
+
+def save_embedding_cache(path: str, cache: dict[str, np.ndarray]):
+    """Persist cached vectors as parallel key and matrix arrays"""
+    temp_path = path + ".tmp"
+
+    try:
+        # Written to a temp file first, a run that dies mid-write keeps the old cache
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                model=np.array(EMBEDDING_MODEL),
+                keys=np.array(list(cache.keys()), dtype=str),
+                vectors=stack_vectors(list(cache.values())),
+            )
+
+        os.replace(temp_path, path)
+
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 
 @dg.asset(group_name="encode_pipeline", deps=["text_chunks_for_embedding"])
 def encoded_vectors(context: dg.AssetExecutionContext) -> None:
@@ -16,26 +76,53 @@ def encoded_vectors(context: dg.AssetExecutionContext) -> None:
     os.makedirs(PARQUET_DIR, exist_ok=True)
 
     parquet_file = os.path.join(PARQUET_DIR, "newsletter_embeddings.parquet")
+    cache_file = os.path.join(PARQUET_DIR, EMBEDDING_CACHE_FILE)
 
-    df = pd.read_parquet(parquet_file)
+    # Payload columns only, vectors from an earlier run get replaced
+    schema = pq.read_schema(parquet_file)
+    df = pd.read_parquet(
+        parquet_file, columns=[name for name in schema.names if name != "vector"]
+    )
 
-    context.log.info("Loading embedding model...")
+    texts = df["text"].tolist()
+    keys = [text_key(text) for text in texts]
 
-    embeddings_model = SentenceTransformer("all-MiniLM-L6-v2")
+    cache = load_embedding_cache(cache_file)
 
-    context.log.info("Encoding vectors...")
+    # Encode each distinct text not seen in a previous run, once
+    missing = {key: text for key, text in zip(keys, texts) if key not in cache}
 
-    vectors = embeddings_model.encode(
-        df["text"].tolist(),
-        normalize_embeddings=True,
-        show_progress_bar=False,
+    context.log.info(
+        f"{len(texts)} chunks, {len(missing)} distinct texts not in the cache"
     )
 
-    df["vector"] = vectors.tolist()
+    if missing:
+        context.log.info("Loading embedding model...")
+
+        embeddings_model = load_torch_model(SentenceTransformer, EMBEDDING_MODEL)
+
+        context.log.info(f"Encoding vectors on {embeddings_model.device}...")
+
+        # encode() already sorts texts by length so each batch pads to its own
+        # longest text, and returns vectors in the original row order
+        new_vectors = embeddings_model.encode(
+            list(missing.values()),
+            batch_size=ENCODE_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+
+        cache.update(zip(missing.keys(), new_vectors))
+
+    # Reassemble in row order, and keep only the texts still in use
+    vectors = stack_vectors([cache[key] for key in keys])
+    save_embedding_cache(cache_file, {key: cache[key] for key in keys})
 
-    # Save to Parquet
-    context.log.info("Updating parquet file with vectors..")
+    # Store vectors next to their payloads as float16. Normalized 384-d vectors
+    # keep dot products within ~1e-4 at half precision
+    context.log.info("Saving vectors..")
 
-    df.to_parquet(parquet_file)
+    write_parquet(df, parquet_file, vectors=vectors)
 
     context.log.info("Done")
@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -6,6 +7,8 @@ import dagster as dg
 from bs4 import BeautifulSoup
 from markdownify import markdownify as md
 
+from pipeline.utils import write_atomic
+
 # Data directories
 DATA_DIR = "data"
 RAW_HTML_DIR = f"{DATA_DIR}/raw/html"
@@ -17,78 +20,66 @@ def html_files() -> list[str]:
     """Scan and return all HTML files from disk"""
     os.makedirs(RAW_HTML_DIR, exist_ok=True)
 
-    files: list[str] = []
-
-    for subdir, dirs, filenames in os.walk(RAW_HTML_DIR):
-        for filename in filenames:
-            if filename.endswith((".html")):
-                files.append(os.path.join(subdir, filename))
-
-    return files
+    # rglob walks with os.scandir and matches on the cached entry names
+    return [str(path) for path in Path(RAW_HTML_DIR).rglob("*.html")]
 
 
-@dg.asset(group_name="markdown_pipeline")
-def markdown_files(
-    context: dg.AssetExecutionContext, html_files: list[str]
-) -> list[str]:
-    """Convert HTML files to Markdown and return MD file paths"""
-    os.makedirs(RAW_MARKDOWN_DIR, exist_ok=True)
-
-    md_files: list[str] = []
+def convert_html_file(file: str) -> str | None:
+    """Convert one HTML issue to Markdown, returning the MD path if it has content"""
+    file_path = Path(file)
 
-    for file in html_files:
-        file_path = Path(file)
+    part = file_path.name.split("_")[0].split("-")
 
-        context.log.info(f"Processing file: {file_path.name}")
+    month_str = part[0]
+    day_str = part[1]
+    year_str = part[2]
 
-        part = file_path.name.split("_")[0].split("-")
+    date_str = f"{month_str}-{day_str}-{year_str}"
 
-        month_str = part[0]
-        day_str = part[1]
-        year_str = part[2]
+    date_obj = datetime.strptime(date_str, "%B-%d-%Y")
 
-        date_str = f"{month_str}-{day_str}-{year_str}"
+    # Parse HTML straight from bytes, lxml decodes them once in C
+    soup = BeautifulSoup(file_path.read_bytes(), "lxml", from_encoding="utf-8")
 
-        context.log.info(f"Date: {date_str}")
+    # Extract issue title
+    title_content = soup.select_one(".page__header h1")
 
-        date_obj = datetime.strptime(date_str, "%B-%d-%Y")
+    if title_content:
+        title_content = title_content.get_text(strip=True)
 
-        context.log.info(f"Parsing HTML to MD for issue {date_obj}")
+    # Extract content
+    main_content = soup.find("div", {"class": "page__content"})
 
-        with open(
-            file,
-            "r",
-            encoding="utf-8",
-        ) as f:
-            html_content = f.read()
+    if not main_content:
+        return None
 
-        # Parse HTML
-        soup = BeautifulSoup(html_content, "html.parser")
+    # Convert HTML to markdown
+    markdown_text = md(str(main_content), heading_style="ATX")
 
-        # Extract issue title
-        title_content = soup.select_one(".page__header h1")
+    final_path = os.path.join(RAW_MARKDOWN_DIR, f"{date_obj.strftime('%Y-%m-%d')}.md")
 
-        if title_content:
-            title_content = title_content.get_text(strip=True)
+    write_atomic(final_path, f"# {title_content}\n\n" + markdown_text)
 
-        # Extract content
-        main_content = soup.find("div", {"class": "page__content"})
+    return final_path
 
-        if main_content:
-            # Convert HTML to markdown
-            markdown_text = md(str(main_content), heading_style="ATX")
 
-            # Atomic write pattern: first on temp then rename
-            final_path = os.path.join(
-                RAW_MARKDOWN_DIR, f"{date_obj.strftime('%Y-%m-%d')}.md"
-            )
+@dg.asset(group_name="markdown_pipeline")
+def markdown_files(
+    context: dg.AssetExecutionContext, html_files: list[str]
+) -> list[str]:
+    """Convert HTML files to Markdown and return MD file paths"""
+    os.makedirs(RAW_MARKDOWN_DIR, exist_ok=True)
 
-            temp_path = final_path + ".tmp"
+    md_files: list[str] = []
 
-            with open(temp_path, "w", encoding="utf-8") as f:
-                f.write(f"# {title_content}\n\n" + markdown_text)
+    # Parsing is CPU-bound and independent per file, spread it across cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for file, md_file in zip(
+            html_files, executor.map(convert_html_file, html_files, chunksize=4)
+        ):
+            context.log.info(f"Processed file: {Path(file).name}")
 
-            os.rename(temp_path, final_path)
-            md_files.append(final_path)
+            if md_file:
+                md_files.append(md_file)
 
     return md_files
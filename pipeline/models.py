@@ -0,0 +1,44 @@
+import functools
+from typing import TypeVar
+
+import torch
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+Model = TypeVar("Model", SentenceTransformer, CrossEncoder)
+
+# Both models run their fp32 ONNX export (onnx/model.onnx), numerically the same
+# as the PyTorch weights the corpus vectors and relevance thresholds come from
+ENCODER_MODEL = "all-MiniLM-L6-v2"
+RERANKER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def load_encoder() -> SentenceTransformer:
+    """Load the query encoder on ONNX Runtime"""
+    return SentenceTransformer(ENCODER_MODEL, backend="onnx")
+
+
+def load_reranker() -> CrossEncoder:
+    """Load the cross-encoder on ONNX Runtime"""
+    return CrossEncoder(RERANKER_MODEL, backend="onnx")
+
+
+def load_torch_model(model_class: type[Model], name: str) -> Model:
+    """
+    Load a PyTorch model on the GPU when there is one, cast to half precision
+    there to halve memory traffic. CPUs stay on fp32.
+    """
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = model_class(name, device=device)
+
+    if device == "cuda":
+        # CrossEncoder wraps its transformer, SentenceTransformer is the module
+        module = model.model if isinstance(model, CrossEncoder) else model
+        module.half()
+
+    return model
+
+
+@functools.lru_cache(maxsize=1024)
+def embed_query(encoder: SentenceTransformer, query: str) -> tuple[float, ...]:
+    """Encode a normalized query vector, repeated queries are served from the cache"""
+    return tuple(encoder.encode(query, normalize_embeddings=True).tolist())
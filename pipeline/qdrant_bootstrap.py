@@ -0,0 +1,123 @@
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+# Data directories
+DATA_DIR = "data"
+PARQUET_DIR = f"{DATA_DIR}/parquet"
+QDRANT_DIR = f"{DATA_DIR}/qdrant"
+
+PARQUET_PATH = f"{PARQUET_DIR}/newsletter_embeddings.parquet"
+COLLECTION_NAME = "3-2-1-newsletter"
+
+
+def load_vectors(table: pa.Table) -> np.ndarray:
+    """
+    View the fixed_size_list<halffloat> vector column as a float16 matrix.
+    The flattened values reshape in place, the only copy is when the column
+    spans several chunks and has to be combined first.
+    """
+    column = table.column("vector").combine_chunks()
+    values = column.flatten().to_numpy()
+
+    # Declared width, so a zero-row table still reshapes to (0, size)
+    return values.reshape(-1, column.type.list_size)
+
+
+def ingest_parquet(qdrant: QdrantClient, parquet_path: str = PARQUET_PATH) -> int:
+    """(Re)create the collection and load every Parquet row into it"""
+    table = pq.read_table(parquet_path)
+
+    qdrant.recreate_collection(
+        collection_name=COLLECTION_NAME,
+        vectors_config=VectorParams(size=384, distance=Distance.DOT),
+    )
+
+    vectors = load_vectors(table)
+
+    # Payload columns only, converted straight from Arrow to Python values
+    payload_table = table.select([c for c in table.column_names if c != "vector"])
+
+    # Precompute UTC unix seconds so date ranges filter on integers
+    dates = pc.strptime(payload_table.column("date"), format="%Y-%m-%d", unit="s")
+    payload_table = payload_table.append_column("date_ts", dates.cast(pa.int64()))
+
+    qdrant.upload_collection(
+        collection_name=COLLECTION_NAME,
+        vectors=vectors,
+        payload=payload_table.to_pylist(),
+        ids=list(range(table.num_rows)),
+        batch_size=64,
+    )
+
+    return table.num_rows
+
+
+def open_vector_db(path: str = QDRANT_DIR) -> QdrantClient:
+    """
+    Open the on-disk Qdrant store, ingesting the Parquet file only when
+    the collection does not exist yet.
+    Local mode locks the folder to one process, so when another one already
+    holds it (app.py, or the MCP server spawned by chat.py) this process
+    serves an in-memory copy seeded from the Parquet file instead.
+    """
+    os.makedirs(path, exist_ok=True)
+
+    try:
+        qdrant = QdrantClient(path=path)
+    except RuntimeError as e:
+        if "already accessed by another instance" not in str(e):
+            raise
+
+        # Warnings go to stderr, stdout is the MCP server's protocol channel
+        warnings.warn(
+            f"{path} is locked by another process, "
+            f"serving an in-memory copy of {PARQUET_PATH} instead",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        qdrant = QdrantClient(location=":memory:")
+
+    if not qdrant.collection_exists(COLLECTION_NAME):
+        if not os.path.exists(PARQUET_PATH):
+            qdrant.close()
+            raise FileNotFoundError(f"Parquet file not found at {PARQUET_PATH}")
+
+        ingest_parquet(qdrant)
+
+    return qdrant
+
+
+def build_vector_db(path: str = QDRANT_DIR) -> int:
+    """
+    Build the on-disk store in a staging folder and swap it in. Processes
+    still holding the previous folder keep serving it until they restart.
+    """
+    staging_path = f"{path}.staging"
+    retired_path = f"{path}.retired"
+
+    shutil.rmtree(staging_path, ignore_errors=True)
+
+    qdrant = QdrantClient(path=staging_path)
+
+    try:
+        count = ingest_parquet(qdrant)
+    finally:
+        qdrant.close()
+
+    shutil.rmtree(retired_path, ignore_errors=True)
+
+    if os.path.exists(path):
+        os.rename(path, retired_path)
+
+    os.rename(staging_path, path)
+    shutil.rmtree(retired_path, ignore_errors=True)
+
+    return count
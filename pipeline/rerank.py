@@ -0,0 +1,76 @@
+import numpy as np
+import torch
+from sentence_transformers import CrossEncoder
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional, the NumPy code below runs as-is without it
+    def njit(f):
+        return f
+
+
+RERANK_BATCH_SIZE = 32
+
+# Early-stopping reranks score small batches, and never fewer than two of them
+EARLY_STOP_BATCH_SIZE = 16
+EARLY_STOP_MIN_BATCHES = 2
+
+
+def rerank(reranker: CrossEncoder, query: str, texts: list[str]) -> np.ndarray:
+    """
+    Score each text against the query and return raw logits in input order.
+    Pairs are fed longest first so every batch pads to texts of similar length.
+    """
+    order = np.argsort([-(len(query) + len(text)) for text in texts], kind="stable")
+    pairs = [[query, texts[i]] for i in order]
+
+    sorted_scores = reranker.predict(
+        pairs,
+        batch_size=RERANK_BATCH_SIZE,
+        activation_fn=torch.nn.Identity(),
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    )
+
+    # Inverse permutation back to the caller's order
+    scores = np.empty_like(sorted_scores)
+    scores[order] = sorted_scores
+
+    return scores
+
+
+def rerank_until(
+    reranker: CrossEncoder,
+    query: str,
+    texts: list[str],
+    min_score: float,
+    limit: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rerank texts in retrieval order one batch at a time, stopping once `limit`
+    of them scored at least `min_score`. Returns indices and scores, best first.
+    """
+    indices: list[int] = []
+    scores: list[float] = []
+
+    for n, start in enumerate(range(0, len(texts), EARLY_STOP_BATCH_SIZE), 1):
+        batch = texts[start : start + EARLY_STOP_BATCH_SIZE]
+        batch_scores = rerank(reranker, query, batch)
+
+        keep = np.flatnonzero(batch_scores >= min_score)
+        indices.extend((keep + start).tolist())
+        scores.extend(batch_scores[keep].tolist())
+
+        if len(indices) >= limit and n >= EARLY_STOP_MIN_BATCHES:
+            break
+
+    order = np.argsort(-np.asarray(scores), kind="stable")[:limit]
+
+    return np.asarray(indices, dtype=np.int64)[order], np.asarray(scores)[order]
+
+
+@njit
+def bucketize(scores: np.ndarray) -> np.ndarray:
+    """Map rerank logits to relevance buckets: 0 high (>= 3), 1 medium (>= 0), 2 low"""
+    return np.where(scores >= 3, 0, np.where(scores >= 0, 1, 2))
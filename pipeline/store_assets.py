@@ -1,10 +1,23 @@
+import asyncio
 import os
-import uuid
 
 import dagster as dg
-import pandas as pd
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+import numpy as np
+import pyarrow.parquet as pq
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Batch,
+    Datatype,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
+
+from pipeline.qdrant_bootstrap import QDRANT_DIR, build_vector_db, load_vectors
 
 # Data directories
 DATA_DIR = "data"
@@ -12,6 +25,47 @@ DATA_DIR = "data"
 PARQUET_DIR = f"{DATA_DIR}/parquet"
 COLLECTION_NAME = "3-2-1-newsletter"
 
+QDRANT_URL = "http://localhost:6333"
+
+# int8 scalar quantization on the server: 4x smaller vectors, kept in RAM for scoring
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(
+        type=ScalarType.INT8,
+        quantile=0.99,
+        always_ram=True,
+    )
+)
+
+# Points per upsert request, and requests in flight at once
+UPLOAD_BATCH_SIZE = 256
+MAX_CONCURRENT_UPLOADS = 4
+
+
+async def upload_batches(vectors: np.ndarray, payloads: list[dict]) -> None:
+    """Upsert points in batches concurrently over a single async client"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+    client = AsyncQdrantClient(url=QDRANT_URL, prefer_grpc=True)
+
+    async def upsert(start: int) -> None:
+        end = min(start + UPLOAD_BATCH_SIZE, len(payloads))
+
+        async with semaphore:
+            await client.upsert(
+                collection_name=COLLECTION_NAME,
+                points=Batch(
+                    ids=list(range(start, end)),
+                    vectors=vectors[start:end].tolist(),
+                    payloads=payloads[start:end],
+                ),
+            )
+
+    try:
+        await asyncio.gather(
+            *(upsert(start) for start in range(0, len(payloads), UPLOAD_BATCH_SIZE))
+        )
+    finally:
+        await client.close()
+
 
 @dg.asset(group_name="store_pipeline", deps=["encoded_vectors"])
 def stored_vectors(context: dg.AssetExecutionContext) -> None:
@@ -20,13 +74,17 @@ def stored_vectors(context: dg.AssetExecutionContext) -> None:
 
     parquet_file = os.path.join(PARQUET_DIR, "newsletter_embeddings.parquet")
 
-    df = pd.read_parquet(parquet_file)
+    table = pq.read_table(parquet_file, use_threads=True)
+
+    # Vectors come out of the Arrow column as a matrix, the rest is payload
+    vectors = load_vectors(table)
+    table = table.drop_columns(["vector"])
 
     context.log.info(
-        f"Loaded {len(df)} records. Vector shape: {len(df.iloc[0]['vector'])}"
+        f"Loaded {table.num_rows} records. Vector shape: {vectors.shape[1]}"
     )
 
-    qdrant = QdrantClient(url="http://localhost:6333")
+    qdrant = QdrantClient(url=QDRANT_URL, prefer_grpc=True)
 
     try:
         qdrant.get_collections()
@@ -37,43 +95,47 @@ def stored_vectors(context: dg.AssetExecutionContext) -> None:
 
     if not qdrant.collection_exists(COLLECTION_NAME):
         context.log.info(f"Creating collection '{COLLECTION_NAME}'...")
-        qdrant.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=384, distance=Distance.DOT),
-        )
     else:
         context.log.info(
             f"Collection '{COLLECTION_NAME}' already exists. Recreating..."
         )
         qdrant.delete_collection(COLLECTION_NAME)
-        qdrant.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=384, distance=Distance.DOT),
-        )
 
-    points: list[PointStruct] = []
+    # Defer HNSW graph construction until every point is uploaded. Search runs
+    # on int8 copies kept in RAM, the fp16 originals stay on disk for rescoring
+    qdrant.create_collection(
+        collection_name=COLLECTION_NAME,
+        vectors_config=VectorParams(
+            size=384,
+            distance=Distance.DOT,
+            datatype=Datatype.FLOAT16,
+            on_disk=True,
+        ),
+        quantization_config=QUANTIZATION_CONFIG,
+        hnsw_config=HnswConfigDiff(m=0),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+    )
 
-    for i, (idx, row) in enumerate(df.iterrows()):
-        # Pull the vector out into a list
-        vector: list[float] = row["vector"].tolist()
+    # One record per row, aligned with the vectors matrix
+    payloads = table.to_pylist()
 
-        # Convert the row to a dictionary and remove vector
-        payload = row.to_dict()
-        payload.pop("vector", None)
+    asyncio.run(upload_batches(vectors, payloads))
 
-        points.append(
-            PointStruct(
-                id=uuid.uuid4().hex,
-                vector=vector,
-                payload=payload,
-            )
-        )
+    # Build the HNSW index once, in bulk
+    context.log.info("Upload done. Enabling HNSW indexing...")
 
-    qdrant.upload_points(
+    qdrant.update_collection(
         collection_name=COLLECTION_NAME,
-        points=points,
-        batch_size=64,
-        parallel=1,
+        hnsw_config=HnswConfigDiff(m=16),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=20000),
     )
 
-    context.log.info(f"Success! {len(points)} records indexed.")
+    context.log.info(f"Success! {len(payloads)} records indexed.")
+
+
+@dg.asset(group_name="store_pipeline", deps=["encoded_vectors"])
+def local_vector_store(context: dg.AssetExecutionContext) -> None:
+    """Build the on-disk Qdrant store opened by the app and MCP server"""
+    count = build_vector_db(QDRANT_DIR)
+
+    context.log.info(f"Success! {count} records indexed in {QDRANT_DIR}.")
@@ -1,15 +1,72 @@
+import asyncio
 import hashlib
 import os
 import re
 import xml.etree.ElementTree as ET
 from typing import Any
 
+import httpx
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
+# Transient failures are retried with exponential backoff: 0.3s, 0.6s, 1.2s
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.3
+
+# Longest Retry-After honoured, so one response cannot park a download slot
+MAX_RETRY_AFTER = 30
+
+# Sitemap session: keep-alive connections and retries with backoff on transient errors
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=MAX_RETRIES,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+        )
+    ),
+)
+
+# Low-cardinality Parquet columns worth dictionary encoding (text is unique per row)
+PARQUET_DICTIONARY_COLUMNS = (
+    "category",
+    "date",
+    "title",
+    "url",
+    "source",
+    "source_name",
+)
+
+# Markdown link [text](url)
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\([^\)]+\)")
+
+# Run of newlines with only whitespace between them, i.e. blank lines
+BLANK_LINES_PATTERN = re.compile(r"\n\s*\n")
+
+# Newsletter structure
+SHARE_LINE_PATTERN = re.compile(r"^\[Share this on.*\n?", re.MULTILINE)
+HEADER_PATTERN = re.compile(r"^##\s+", re.MULTILINE)
+ROMAN_NUMERAL_PATTERN = re.compile(r"[IVX]+\.", re.MULTILINE)
+
+# Quote attribution, either a [title](url) link or plain text
+SOURCE_PATTERN = re.compile(
+    r"\*Source:\*\s*(?:\[(?P<title>[^\]]+)\]\((?P<url>[^\)]+)\)|(?P<text>.+)$)",
+    re.MULTILINE,
+)
+
 
 def get_sitemap_urls(sitemap_index_url: str) -> list[str]:
     """
@@ -19,22 +76,25 @@ def get_sitemap_urls(sitemap_index_url: str) -> list[str]:
     print(f"Fetching sitemap index: {sitemap_index_url}")
 
     try:
-        response = requests.get(sitemap_index_url, headers=HEADERS)
+        with SESSION.get(sitemap_index_url, stream=True) as response:
+            if response.status_code != 200:
+                print(f"Failed to get sitemap. Status: {response.status_code}")
+                return []
 
-        if response.status_code != 200:
-            print(f"Failed to get sitemap. Status: {response.status_code}")
-            return []
+            # Parse the XML as it streams in, decompressing on the fly
+            response.raw.decode_content = True
 
-        # Parse the XML
-        root = ET.fromstring(response.content)
+            loc_tag = "{http://www.sitemaps.org/schemas/sitemap/0.9}loc"
+            urls: list[str] = []
 
-        ns = {"sitemap": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+            for _, elem in ET.iterparse(response.raw):
+                if elem.tag == loc_tag and elem.text is not None:
+                    urls.append(elem.text)
 
-        return list(
-            loc.text
-            for loc in root.findall(".//sitemap:loc", ns)
-            if loc.text is not None
-        )
+                # Drop finished elements so memory stays flat
+                elem.clear()
+
+            return urls
 
     except Exception as e:
         print(f"Error parsing sitemap: {e}")
@@ -43,63 +103,114 @@ def get_sitemap_urls(sitemap_index_url: str) -> list[str]:
 
 def get_safe_filename(url):
     slug = url.strip("/").split("/")[-1]
-    url_hash = hashlib.md5(url.encode()).hexdigest()[:6]
+    # Non-cryptographic use: keeps FIPS builds working and existing filenames stable
+    url_hash = hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()[:6]
     return f"{slug}_{url_hash}.html"
 
 
-def download_and_save(url, output_dir):
-    """Download URL to disk. Returns (file_path, was_downloaded)"""
-    filename = get_safe_filename(url)
-    final_path = os.path.join(output_dir, filename)
+def text_key(text: str) -> str:
+    """Short content address of a text, for cache keys"""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
 
-    if os.path.exists(final_path):
-        print(f"Skipping {url} (File exists)")
-        return final_path, False
+async def download_and_save_async(client: httpx.AsyncClient, url, output_dir):
+    """Download URL to disk and return the path, callers skip existing files"""
+    final_path = os.path.join(output_dir, get_safe_filename(url))
 
     print(f"Downloading {url}...")
 
     try:
-        response = requests.get(url, timeout=10, headers=HEADERS)
+        for attempt in range(MAX_RETRIES + 1):
+            delay = RETRY_BACKOFF * 2**attempt
+
+            try:
+                response = await client.get(url, timeout=10, headers=HEADERS)
+            except httpx.TransportError:
+                if attempt == MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    break
+
+                # Rate limited or unavailable: wait as long as the server asks, capped
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, min(float(retry_after), MAX_RETRY_AFTER))
+
+            print(f"Retrying {url} in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+
         response.raise_for_status()
 
-        # Atomic write pattern: first on temp then rename
-        temp_path = final_path + ".tmp"
+        # Keep disk I/O off the event loop
+        await asyncio.to_thread(write_atomic, final_path, response.text)
+
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+        raise
 
-        with open(temp_path, "w", encoding="utf-8") as f:
-            f.write(response.text)
+    return final_path
 
-        os.rename(temp_path, final_path)
 
-        return final_path, True
+def write_atomic(final_path: str, text: str):
+    """Atomic write pattern: first on temp then rename"""
+    temp_path = final_path + ".tmp"
 
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        temp_path = final_path + ".tmp"
+    try:
+        # Encode once and hand the bytes over in a single write
+        with open(temp_path, "wb") as f:
+            f.write(text.encode("utf-8"))
+
+        os.replace(temp_path, final_path)
+
+    except BaseException:
+        # Never leave a partial temp file behind
         if os.path.exists(temp_path):
             os.remove(temp_path)
-        raise e
+        raise
+
+
+def write_parquet(df: pd.DataFrame, path: str, vectors: np.ndarray | None = None):
+    """
+    Write a DataFrame to Parquet with zstd and dictionary-encoded metadata.
+    Vectors, when given, are stored row-aligned in a fixed_size_list<halffloat>
+    column that reads back into the matrix without a copy.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if vectors is not None:
+        values = pa.array(np.ascontiguousarray(vectors, dtype=np.float16).reshape(-1))
+        table = table.append_column(
+            "vector", pa.FixedSizeListArray.from_arrays(values, vectors.shape[1])
+        )
+
+    pq.write_table(
+        table,
+        path,
+        compression="zstd",
+        compression_level=3,
+        use_dictionary=[
+            c for c in PARQUET_DICTIONARY_COLUMNS if c in table.column_names
+        ],
+    )
 
 
 def clean_links(text):
     """Regex to find [text](url) and replaces it with just 'text'"""
-    return re.sub(r"\[([^\]]+)\]\([^\)]+\)", r"\1", text)
+    return LINK_PATTERN.sub(r"\1", text)
 
 
 def trim_empty_lines(text: str):
-    text = "\n".join([s for s in text.strip().splitlines() if s.strip()])
-    return text.strip()
+    return BLANK_LINES_PATTERN.sub("\n", text.strip())
 
 
 def parse_newsletter(md_text, issue_date="Unknown") -> list[dict[str, Any]]:
     """Parse newsletter markdown into structured chunks"""
     chunks: list[dict[str, Any]] = []
 
-    clean_text = re.sub(r"^\[Share this on.*\n?", "", md_text, flags=re.MULTILINE)
+    clean_text = SHARE_LINE_PATTERN.sub("", md_text)
 
-    # Header pattern
-    pattern = r"^##\s+"
-
-    sections = re.split(pattern, clean_text, flags=re.MULTILINE)
+    sections = HEADER_PATTERN.split(clean_text)
 
     print(f"Total sections found: {len(sections)}")
 
@@ -109,7 +220,7 @@ def parse_newsletter(md_text, issue_date="Unknown") -> list[dict[str, Any]]:
 
         if "3 IDEAS FROM ME" in section:
             # Split by Roman Numerals (I., II., III.)
-            ideas = re.split(r"[IVX]+\.", section, flags=re.MULTILINE)
+            ideas = ROMAN_NUMERAL_PATTERN.split(section)
 
             for i, idea in enumerate(ideas[1:], 1):  # Skip header
                 chunks.append(
@@ -124,27 +235,22 @@ def parse_newsletter(md_text, issue_date="Unknown") -> list[dict[str, Any]]:
                 )
 
         elif "2 QUOTES FROM OTHERS" in section:
-            quotes = re.split(r"[IVX]+\.", section, flags=re.MULTILINE)
+            quotes = ROMAN_NUMERAL_PATTERN.split(section)
             for i, quote in enumerate(quotes[1:], 1):
-                source_match = re.search(
-                    r"\*Source:\*\s*\[([^\]]+)\]\(([^\)]+)\)", quote
-                )
+                source_match = SOURCE_PATTERN.search(quote)
 
                 source_title = None
                 source_url = None
 
                 if source_match:
-                    # We found a link! Capture title and URL
-                    source_title = source_match.group(1).replace("*", "")
-                    source_url = source_match.group(2)
-                else:
-                    # Fallback: Maybe there was no link, just text
-                    text_match = re.search(r"\*Source:\*\s*(.+)$", quote, re.MULTILINE)
-
-                    if text_match:
-                        source_title = text_match.group(1).replace("*", "")
-
-                clean_quote = re.sub(r"\n\*Source:\*.*", "", quote, flags=re.DOTALL)
+                    # Link: capture title and URL, otherwise fall back to the text
+                    title = source_match.group("title") or source_match.group("text")
+                    source_title = title.replace("*", "")
+                    source_url = source_match.group("url")
+
+                # Drop everything from the source line on
+                source_start = quote.find("\n*Source:*")
+                clean_quote = quote[:source_start] if source_start != -1 else quote
                 clean_quote = clean_links(clean_quote)
                 clean_quote = clean_quote.replace("**", "").replace("  ", " ").strip()
 
@@ -1,30 +1,70 @@
+import functools
+import os
+import shelve
 import sys
 from dataclasses import dataclass
 
 import numpy as np
 from qdrant_client import QdrantClient
-from sentence_transformers import CrossEncoder, SentenceTransformer
+from rich import box
 from rich.console import Console
 from rich.table import Table
-from rich import box
+from scipy.special import expit
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+from pipeline.models import ENCODER_MODEL, RERANKER_MODEL, load_torch_model
+from pipeline.rerank import bucketize, rerank
+from pipeline.utils import text_key
+
+# Query vectors and rerank scores persist across invocations
+CACHE_DIR = ".cache"
+CACHE_PATH = f"{CACHE_DIR}/query"
 
-encoder = SentenceTransformer("all-MiniLM-L6-v2")
-reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
 console = Console()
 
+# Indexed by bucketize: high, medium, low
+RELEVANCE_LABELS = ("🟢", "🟡", "🔴")
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoder() -> SentenceTransformer:
+    """Load the bi-encoder once, and only when a query misses the cache"""
+    return load_torch_model(SentenceTransformer, ENCODER_MODEL)
+
+
+@functools.lru_cache(maxsize=1)
+def get_reranker() -> CrossEncoder:
+    """Load the cross-encoder once, and only when a pair misses the cache"""
+    return load_torch_model(CrossEncoder, RERANKER_MODEL)
+
+
+def embed(cache: shelve.Shelf, query: str) -> list[float]:
+    """Encode the query, reusing the vector from a previous run if there is one"""
+    key = f"vector:{ENCODER_MODEL}:{text_key(query)}"
+
+    if key not in cache:
+        cache[key] = get_encoder().encode(query, normalize_embeddings=True).tolist()
+
+    return cache[key]
 
-def sigmoid(x):
-    """Converts a logit (e.g., 4.5) to a probability (0.0 - 1.0)"""
-    return 1 / (1 + np.exp(-x))
 
+def cached_rerank(cache: shelve.Shelf, query: str, texts: list[str]) -> list[float]:
+    """
+    Score (query, text) pairs as raw logits, predicting only the ones not
+    scored before. rerank feeds them length-sorted so padding stays per-batch.
+    """
+    # Hashed pairs keep keys short, chunk texts run to several KB
+    pair_keys = (text_key(query + "\x00" + text) for text in texts)
+    keys = [f"score:{RERANKER_MODEL}:{key}" for key in pair_keys]
+    missing = [i for i, key in enumerate(keys) if key not in cache]
 
-def get_relevance_label(logit):
-    """Maps a raw score to a human-readable label"""
-    if logit >= 3:
-        return "🟢"
-    elif logit >= 0:
-        return "🟡"
-    return "🔴"
+    if missing:
+        scores = rerank(get_reranker(), query, [texts[i] for i in missing])
+
+        for i, score in zip(missing, scores):
+            cache[keys[i]] = float(score)
+
+    return [cache[key] for key in keys]
 
 
 qdrant = QdrantClient(url="http://localhost:6333")
@@ -43,71 +83,75 @@ test_cases = [
     ),
 ]
 
-for case in test_cases:
-    query = case.query
-
-    # Calculate embeddings
-    query_vector = encoder.encode(query, normalize_embeddings=True).tolist()
-
-    # Initial retrieval
-    hits = qdrant.query_points(
-        collection_name=COLLECTION_NAME, query=query_vector, limit=20
-    ).points
-
-    pairs = [[query, hit.payload.get("text", "")] for hit in hits]
-
-    # Predict scores (This runs the heavy transformer math)
-    cross_scores = reranker.predict(pairs)
-
-    # Combine initial hits with new scores
-    reranked_results = list(zip(hits, cross_scores))
-
-    # Sort by the NEW score (Descending)
-    reranked_results = sorted(reranked_results, key=lambda x: x[1], reverse=True)
-
-    # Create Rich Table
-    table = Table(title=f"Search Results for: '{query}'", box=box.ROUNDED)
-
-    table.add_column("Date", style="cyan", no_wrap=True)
-    table.add_column("Category", style="magenta")
-    table.add_column("Snippet", style="green")
-    table.add_column("Init Score", justify="right")
-    table.add_column("Rerank", justify="right")
-    table.add_column("Prob", justify="right")
-    table.add_column("Label", justify="center")
-
-    for hit, new_score in reranked_results:
-        date = hit.payload.get("date", "N/A")
-        category = hit.payload.get("category", "N/A")
-        text = hit.payload.get("text", "")
-        prob = sigmoid(new_score) * 100
-        label = get_relevance_label(new_score)
-
-        # Truncate text for the table
-        snippet = (text[:50] + "...") if len(text) > 50 else text
-
-        table.add_row(
-            str(date),
-            str(category)[:15],
-            snippet,
-            f"{hit.score:.4f}",
-            f"{new_score:+.4f}",
-            f"{prob:3.1f}%",
-            label,
-        )
-
-    console.print(table)
-    console.print("\n")
-
-    # Detailed view for top results (positive scores)
-    for hit, new_score in reranked_results:
-        if new_score >= 0:
-            title = hit.payload.get("title", "No Title")
-            date = hit.payload.get("date", "N/A")
-            link = hit.payload.get("url", "#")
-            text = hit.payload.get("text", "")
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+with shelve.open(CACHE_PATH) as cache:
+    for case in test_cases:
+        query = case.query
+
+        # Calculate embeddings
+        query_vector = embed(cache, query)
+
+        # Initial retrieval
+        hits = qdrant.query_points(
+            collection_name=COLLECTION_NAME, query=query_vector, limit=20
+        ).points
+
+        texts = [hit.payload.get("text", "") for hit in hits]
 
-            console.print(f"[bold underline]{title}[/bold underline]")
-            console.print(f"[dim]DATE: {date} | LINK: {link}[/dim]")
-            console.print(f"{text}\n")
-            console.print("---")
\ No newline at end of file
+        # Predict scores (This runs the heavy transformer math)
+        cross_scores = np.asarray(cached_rerank(cache, query, texts))
+
+        # Probabilities and labels for every hit at once
+        probs = expit(cross_scores) * 100
+        buckets = bucketize(cross_scores)
+
+        # Sort by the NEW score (Descending)
+        order = np.argsort(-cross_scores, kind="stable")
+
+        # Create Rich Table
+        table = Table(title=f"Search Results for: '{query}'", box=box.ROUNDED)
+
+        table.add_column("Date", style="cyan", no_wrap=True)
+        table.add_column("Category", style="magenta")
+        table.add_column("Snippet", style="green")
+        table.add_column("Init Score", justify="right")
+        table.add_column("Rerank", justify="right")
+        table.add_column("Prob", justify="right")
+        table.add_column("Label", justify="center")
+
+        for i in order:
+            hit = hits[i]
+            date = hit.payload.get("date", "N/A")
+            category = hit.payload.get("category", "N/A")
+            text = texts[i]
+
+            # Truncate text for the table
+            snippet = (text[:50] + "...") if len(text) > 50 else text
+
+            table.add_row(
+                str(date),
+                str(category)[:15],
+                snippet,
+                f"{hit.score:.4f}",
+                f"{cross_scores[i]:+.4f}",
+                f"{probs[i]:3.1f}%",
+                RELEVANCE_LABELS[buckets[i]],
+            )
+
+        console.print(table)
+        console.print("\n")
+
+        # Detailed view for top results (positive scores)
+        for i in order:
+            if cross_scores[i] >= 0:
+                hit = hits[i]
+                title = hit.payload.get("title", "No Title")
+                date = hit.payload.get("date", "N/A")
+                link = hit.payload.get("url", "#")
+                text = hit.payload.get("text", "")
+
+                console.print(f"[bold underline]{title}[/bold underline]")
+                console.print(f"[dim]DATE: {date} | LINK: {link}[/dim]")
+                console.print(f"{text}\n")
+                console.print("---")
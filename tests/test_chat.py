@@ -0,0 +1,76 @@
+import unittest
+
+from chat import MAX_HISTORY, MCPAgent
+
+
+def turn(n: int) -> list[dict]:
+    """One user turn answered through a tool call"""
+    return [
+        {"role": "user", "content": f"question {n}"},
+        {"role": "assistant", "tool_calls": [{"id": f"call_{n}"}]},
+        {"role": "tool", "tool_call_id": f"call_{n}", "content": "result"},
+        {"role": "assistant", "content": f"answer {n}"},
+    ]
+
+
+class TrimHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = MCPAgent(api_key="test", model="test")
+        self.system = {"role": "system", "content": "system prompt"}
+
+    def test_short_history_is_unchanged(self):
+        messages = [self.system, *turn(0)]
+        self.agent.messages = list(messages)
+
+        self.agent._trim_history()
+
+        self.assertEqual(self.agent.messages, messages)
+
+    def test_keeps_system_message_and_starts_on_user_turn(self):
+        history = [m for n in range(10) for m in turn(n)]
+        latest = {"role": "user", "content": "latest"}
+        self.agent.messages = [self.system, *history, latest]
+
+        self.agent._trim_history()
+
+        messages = self.agent.messages
+        self.assertEqual(messages[0], self.system)
+        self.assertEqual(messages[1]["role"], "user")
+        self.assertEqual(messages[-1], latest)
+        self.assertLessEqual(len(messages), MAX_HISTORY + 1)
+
+        # Every tool result still follows the assistant call that requested it
+        call_ids = set()
+        for message in messages:
+            for call in message.get("tool_calls", []):
+                call_ids.add(call["id"])
+            if message["role"] == "tool":
+                self.assertIn(message["tool_call_id"], call_ids)
+
+    def test_window_boundary_on_tool_message_skips_to_next_user(self):
+        # Ten full turns, then a new question with its tool call in flight
+        history = [m for n in range(11) for m in turn(n)][:-2]
+        self.agent.messages = [self.system, *history]
+
+        # The plain window would start on the tool message of turn 5
+        window_start = len(self.agent.messages) - MAX_HISTORY
+        self.assertEqual(self.agent.messages[window_start]["role"], "tool")
+
+        self.agent._trim_history()
+
+        self.assertEqual(self.agent.messages[0], self.system)
+        self.assertEqual(self.agent.messages[1:], history[24:])
+        self.assertEqual(self.agent.messages[1]["content"], "question 6")
+
+    def test_without_system_message(self):
+        history = [m for n in range(10) for m in turn(n)]
+        self.agent.messages = list(history)
+
+        self.agent._trim_history()
+
+        self.assertEqual(self.agent.messages[0]["role"], "user")
+        self.assertEqual(self.agent.messages, history[-MAX_HISTORY:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from pipeline.encode_assets import (
+    EMBEDDING_DIM,
+    EMBEDDING_MODEL,
+    load_embedding_cache,
+    save_embedding_cache,
+    stack_vectors,
+)
+from pipeline.qdrant_bootstrap import load_vectors
+from pipeline.utils import text_key, write_parquet
+
+
+class EmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "embedding_cache.npz")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_text_key_is_stable_per_text(self):
+        self.assertEqual(text_key("a chunk"), text_key("a chunk"))
+        self.assertNotEqual(text_key("a chunk"), text_key("another chunk"))
+        self.assertEqual(len(text_key("a chunk")), 32)
+
+    def test_roundtrip(self):
+        rng = np.random.default_rng(0)
+        cache = {
+            text_key(text): rng.standard_normal(EMBEDDING_DIM).astype(np.float32)
+            for text in ["one", "two", "three"]
+        }
+
+        save_embedding_cache(self.path, cache)
+        loaded = load_embedding_cache(self.path)
+
+        self.assertEqual(list(loaded), list(cache))
+        for key, vector in cache.items():
+            self.assertEqual(loaded[key].dtype, np.float16)
+            np.testing.assert_allclose(loaded[key], vector, rtol=1e-3, atol=1e-3)
+
+    def test_missing_file(self):
+        self.assertEqual(load_embedding_cache(self.path), {})
+
+    def test_other_model_is_ignored(self):
+        np.savez(
+            self.path,
+            model=np.array("other-model"),
+            keys=np.array([text_key("one")]),
+            vectors=np.zeros((1, EMBEDDING_DIM), dtype=np.float16),
+        )
+
+        self.assertNotEqual(EMBEDDING_MODEL, "other-model")
+        self.assertEqual(load_embedding_cache(self.path), {})
+
+    def test_save_replaces_cache_without_temp_file(self):
+        save_embedding_cache(self.path, {text_key("one"): np.ones(EMBEDDING_DIM)})
+        save_embedding_cache(self.path, {text_key("two"): np.ones(EMBEDDING_DIM)})
+
+        self.assertEqual(list(load_embedding_cache(self.path)), [text_key("two")])
+        self.assertEqual(os.listdir(self.tmp.name), ["embedding_cache.npz"])
+
+    def test_truncated_cache_is_ignored(self):
+        save_embedding_cache(self.path, {text_key("one"): np.ones(EMBEDDING_DIM)})
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        with open(self.path, "wb") as f:
+            f.write(data[: len(data) // 2])
+
+        self.assertEqual(load_embedding_cache(self.path), {})
+
+    def test_empty_cache_roundtrip(self):
+        save_embedding_cache(self.path, {})
+
+        self.assertEqual(load_embedding_cache(self.path), {})
+
+    def test_stack_vectors_without_rows(self):
+        vectors = stack_vectors([])
+
+        self.assertEqual(vectors.shape, (0, EMBEDDING_DIM))
+        self.assertEqual(vectors.dtype, np.float16)
+
+    def test_zero_row_parquet_loads_empty_matrix(self):
+        path = os.path.join(self.tmp.name, "newsletter_embeddings.parquet")
+        df = pd.DataFrame({"text": pd.Series([], dtype=str)})
+
+        write_parquet(df, path, vectors=stack_vectors([]))
+        vectors = load_vectors(pq.read_table(path))
+
+        self.assertEqual(vectors.shape, (0, EMBEDDING_DIM))
+        self.assertEqual(vectors.dtype, np.float16)
+
+
+if __name__ == "__main__":
+    unittest.main()
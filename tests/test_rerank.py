@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+
+from pipeline.rerank import EARLY_STOP_BATCH_SIZE, EARLY_STOP_MIN_BATCHES, rerank_until
+
+
+class FakeReranker:
+    """Scores each (query, text) pair from a fixed table and counts predict calls"""
+
+    def __init__(self, scores: dict[str, float]):
+        self.scores = scores
+        self.calls = 0
+
+    def predict(self, pairs, **kwargs):
+        self.calls += 1
+        return np.array([self.scores[text] for _, text in pairs], dtype=np.float32)
+
+
+def make_texts(scores: list[float]) -> tuple[list[str], dict[str, float]]:
+    """Distinct texts of varying length, so the length sort shuffles each batch"""
+    texts = [f"text {i} " + "x" * (i % 7) for i in range(len(scores))]
+    return texts, dict(zip(texts, scores))
+
+
+class RerankUntilTest(unittest.TestCase):
+    def test_returns_hits_best_first_with_input_indices(self):
+        texts, scores = make_texts([0.5, 4.0, -1.0, 2.0, 3.0])
+
+        indices, top = rerank_until(FakeReranker(scores), "q", texts, 0.0, 3)
+
+        self.assertEqual(indices.tolist(), [1, 4, 3])
+        np.testing.assert_allclose(top, [4.0, 3.0, 2.0])
+
+    def test_stops_after_min_batches_once_limit_is_reached(self):
+        batches = EARLY_STOP_MIN_BATCHES + 3
+        texts, scores = make_texts([5.0] * (EARLY_STOP_BATCH_SIZE * batches))
+        reranker = FakeReranker(scores)
+
+        indices, _ = rerank_until(reranker, "q", texts, 0.0, 1)
+
+        self.assertEqual(reranker.calls, EARLY_STOP_MIN_BATCHES)
+        self.assertEqual(indices.tolist(), [0])
+
+    def test_scores_every_batch_until_limit_is_reached(self):
+        batches = EARLY_STOP_MIN_BATCHES + 2
+        values = [-1.0] * (EARLY_STOP_BATCH_SIZE * batches)
+        values[-1] = 1.0
+        texts, scores = make_texts(values)
+        reranker = FakeReranker(scores)
+
+        indices, top = rerank_until(reranker, "q", texts, 0.0, 1)
+
+        self.assertEqual(reranker.calls, batches)
+        self.assertEqual(indices.tolist(), [len(texts) - 1])
+        np.testing.assert_allclose(top, [1.0])
+
+    def test_no_hits_above_min_score(self):
+        texts, scores = make_texts([-2.0, -1.0])
+
+        indices, top = rerank_until(FakeReranker(scores), "q", texts, 0.0, 5)
+
+        self.assertEqual(indices.dtype, np.int64)
+        self.assertEqual(len(indices), 0)
+        self.assertEqual(len(top), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
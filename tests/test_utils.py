@@ -0,0 +1,201 @@
+import glob
+import os
+import re
+import unittest
+
+from pipeline.utils import (
+    HEADER_PATTERN,
+    ROMAN_NUMERAL_PATTERN,
+    SHARE_LINE_PATTERN,
+    SOURCE_PATTERN,
+    clean_links,
+    parse_newsletter,
+    trim_empty_lines,
+)
+
+RAW_MARKDOWN_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "md")
+
+# Source parsing before the patterns were merged, kept as the reference
+BASELINE_SOURCE_LINK_PATTERN = re.compile(r"\*Source:\*\s*\[([^\]]+)\]\(([^\)]+)\)")
+BASELINE_SOURCE_TEXT_PATTERN = re.compile(r"\*Source:\*\s*(.+)$", re.MULTILINE)
+BASELINE_SOURCE_BLOCK_PATTERN = re.compile(r"\n\*Source:\*.*", re.DOTALL)
+
+
+def baseline_trim_empty_lines(text: str) -> str:
+    """trim_empty_lines before the compiled pattern, kept as the reference"""
+    text = "\n".join([s for s in text.strip().splitlines() if s.strip()])
+    return text.strip()
+
+
+def baseline_source(quote: str) -> tuple[str | None, str | None, str]:
+    """Source title, URL and the quote without its source block, as parsed before"""
+    source_title = None
+    source_url = None
+
+    link_match = BASELINE_SOURCE_LINK_PATTERN.search(quote)
+
+    if link_match:
+        source_title = link_match.group(1).replace("*", "")
+        source_url = link_match.group(2)
+    else:
+        text_match = BASELINE_SOURCE_TEXT_PATTERN.search(quote)
+
+        if text_match:
+            source_title = text_match.group(1).replace("*", "")
+
+    return source_title, source_url, BASELINE_SOURCE_BLOCK_PATTERN.sub("", quote)
+
+
+def quote_chunks(md_text: str) -> list[dict]:
+    return [
+        chunk
+        for chunk in parse_newsletter(md_text)
+        if chunk["metadata"]["category"] == "quote"
+    ]
+
+
+def corpus() -> list[str]:
+    return sorted(glob.glob(os.path.join(RAW_MARKDOWN_DIR, "*.md")))
+
+
+def newsletter(quotes: str) -> str:
+    return f"## 2 QUOTES FROM OTHERS\n\nI.\n\n{quotes}\n\n---\n"
+
+
+class SourcePatternTest(unittest.TestCase):
+    def test_link_source(self):
+        match = SOURCE_PATTERN.search("*Source:* [*Mastery*](https://example.com/m)*")
+
+        self.assertEqual(match.group("title"), "*Mastery*")
+        self.assertEqual(match.group("url"), "https://example.com/m")
+        self.assertIsNone(match.group("text"))
+
+    def test_link_source_without_space(self):
+        match = SOURCE_PATTERN.search("*Source:*[Mastery](https://example.com/m)")
+
+        self.assertEqual(match.group("title"), "Mastery")
+        self.assertEqual(match.group("url"), "https://example.com/m")
+
+    def test_plain_text_source_stops_at_line_end(self):
+        match = SOURCE_PATTERN.search("*Source:* Seneca, *Letters*\nmore text")
+
+        self.assertIsNone(match.group("title"))
+        self.assertIsNone(match.group("url"))
+        self.assertEqual(match.group("text"), "Seneca, *Letters*")
+
+
+class TrimEmptyLinesTest(unittest.TestCase):
+    def test_collapses_blank_lines(self):
+        self.assertEqual(trim_empty_lines("a\n\n\nb\n  \n\t\nc"), "a\nb\nc")
+
+    def test_strips_surrounding_whitespace(self):
+        self.assertEqual(trim_empty_lines("\n\n  a\nb  \n\n"), "a\nb")
+
+    def test_keeps_indentation_of_non_blank_lines(self):
+        self.assertEqual(trim_empty_lines("a\n\n  b"), "a\n  b")
+
+    def test_empty_and_blank_text(self):
+        self.assertEqual(trim_empty_lines(""), "")
+        self.assertEqual(trim_empty_lines(" \n\n "), "")
+
+    @unittest.skipUnless(corpus(), "no Markdown issues in data/raw/md")
+    def test_corpus_matches_baseline(self):
+        for path in corpus():
+            with open(path, encoding="utf-8") as f:
+                md_text = f.read()
+
+            with self.subTest(path=os.path.basename(path)):
+                self.assertEqual(
+                    trim_empty_lines(md_text), baseline_trim_empty_lines(md_text)
+                )
+
+
+class ParseNewsletterQuoteTest(unittest.TestCase):
+    def test_link_source(self):
+        md_text = newsletter(
+            "**Seneca** wrote:\n\n“Luck is what happens when preparation meets"
+            " [opportunity](https://example.com/o).”\n\n"
+            "*Source:* [*Letters from a Stoic*](https://example.com/l)*"
+        )
+
+        (chunk,) = quote_chunks(md_text)
+
+        self.assertEqual(
+            chunk["text"],
+            "Quote from Letters from a Stoic: Seneca wrote:\n"
+            "“Luck is what happens when preparation meets opportunity.”",
+        )
+        self.assertEqual(chunk["metadata"]["source"], "https://example.com/l")
+        self.assertEqual(chunk["metadata"]["source_name"], "Letters from a Stoic")
+
+    def test_plain_text_source(self):
+        md_text = newsletter("“Well begun is half done.”\n\n*Source:* *Aristotle*")
+
+        (chunk,) = quote_chunks(md_text)
+
+        self.assertEqual(
+            chunk["text"], "Quote from Aristotle: “Well begun is half done.”"
+        )
+        self.assertIsNone(chunk["metadata"]["source"])
+        self.assertEqual(chunk["metadata"]["source_name"], "Aristotle")
+
+    def test_no_source(self):
+        (chunk,) = quote_chunks(newsletter("“Well begun is half done.”"))
+
+        self.assertEqual(chunk["text"], "“Well begun is half done.”")
+        self.assertIsNone(chunk["metadata"]["source"])
+        self.assertIsNone(chunk["metadata"]["source_name"])
+
+    def test_first_of_two_sources_wins(self):
+        # The old link-first search picked the later link here, the merged
+        # pattern takes whichever source line comes first
+        md_text = newsletter(
+            "“Well begun is half done.”\n\n"
+            "*Source:* Aristotle\n\n"
+            "*Source:* [Politics](https://example.com/p)"
+        )
+
+        (chunk,) = quote_chunks(md_text)
+
+        self.assertEqual(
+            chunk["text"], "Quote from Aristotle: “Well begun is half done.”"
+        )
+        self.assertIsNone(chunk["metadata"]["source"])
+        self.assertEqual(chunk["metadata"]["source_name"], "Aristotle")
+
+    @unittest.skipUnless(corpus(), "no Markdown issues in data/raw/md")
+    def test_corpus_matches_baseline_source_parsing(self):
+        for path in corpus():
+            with open(path, encoding="utf-8") as f:
+                md_text = f.read()
+
+            # Quotes split the same way parse_newsletter does
+            quotes = [
+                quote
+                for section in HEADER_PATTERN.split(SHARE_LINE_PATTERN.sub("", md_text))
+                if "2 QUOTES FROM OTHERS" in section
+                for quote in ROMAN_NUMERAL_PATTERN.split(
+                    section.strip().replace("---", "")
+                )[1:]
+            ]
+            chunks = quote_chunks(md_text)
+
+            with self.subTest(path=os.path.basename(path)):
+                self.assertEqual(len(chunks), len(quotes))
+
+                for quote, chunk in zip(quotes, chunks):
+                    source_title, source_url, clean_quote = baseline_source(quote)
+                    clean_quote = clean_links(clean_quote)
+                    clean_quote = clean_quote.replace("**", "").replace("  ", " ")
+                    clean_quote = clean_quote.strip()
+
+                    if source_title:
+                        clean_quote = f"Quote from {source_title}: {clean_quote}"
+
+                    self.assertEqual(chunk["text"], trim_empty_lines(clean_quote))
+                    self.assertEqual(chunk["metadata"]["source"], source_url)
+                    self.assertEqual(chunk["metadata"]["source_name"], source_title)
+
+
+if __name__ == "__main__":
+    unittest.main()